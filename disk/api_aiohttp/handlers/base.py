@@ -1,7 +1,20 @@
+from typing import Callable, Iterable
+
+from aiohttp.web_request import BaseRequest
 from aiohttp_pydantic import PydanticView as BasePydanticView
+from aiohttp_pydantic.injectors import AbstractInjector, BodyGetter
 from asyncpgsa import PG
 from pydantic import ValidationError
 
+from disk import models
+
+
+class ImportBodyGetter(BodyGetter):
+    """Injects RequestImport parsed from raw bytes by the fast path parser."""
+
+    async def inject(self, request: BaseRequest, args_view: list, kwargs_view: dict):
+        kwargs_view[self.arg_name] = models.parse_request_import(await request.read())
+
 
 class PydanticView(BasePydanticView):
     URL_PATH: str
@@ -10,6 +23,16 @@ class PydanticView(BasePydanticView):
     def pg(self) -> PG:
         return self.request.app['pg']
 
+    @staticmethod
+    def parse_func_signature(func: Callable) -> Iterable[AbstractInjector]:
+        injectors = BasePydanticView.parse_func_signature(func)
+
+        return [
+            ImportBodyGetter({inj.arg_name: inj.model}, {})
+            if isinstance(inj, BodyGetter) and inj.model is models.RequestImport else inj
+            for inj in injectors
+        ]
+
     async def on_validation_error(self,
                                   exception: ValidationError,
                                   context: str):
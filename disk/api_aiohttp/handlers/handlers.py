@@ -62,7 +62,7 @@ class NodeView(PydanticView):
         """
         service = services.NodeService(self.pg, node_id)
         node = await service.get_node()
-        return Response(body=node.dict(by_alias=True))
+        return Response(body=node.json_dict())
 
 
 class DeleteNodeView(PydanticView):
@@ -1,10 +1,13 @@
 from datetime import datetime
 from inspect import Parameter
+from typing import Any
 
 from asyncpgsa import PG
 from fastapi import APIRouter, status, Request, Depends
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import Response, ORJSONResponse
 from makefun import wraps
+from pydantic import BaseModel, ValidationError
 
 from disk import models
 from disk.resources import url_paths
@@ -15,12 +18,26 @@ def get_pg(request: Request) -> PG:
     return request.app.state.pg
 
 
-def service_depends(service_class):
+async def get_request_import(request: Request) -> models.RequestImport:
+    try:
+        return models.parse_request_import(await request.body())
+    except ValidationError as err:
+        raise RequestValidationError(err.raw_errors)
+
+
+def service_depends(service_class, **depends):
+    """
+    :param depends: custom dependencies for service init arguments
+        (instead of the ones that fastapi infers from the annotations).
+    """
     @wraps(
         service_class.__init__,
-        remove_args=('pg', 'self'),
-        append_args=Parameter('pg', Parameter.POSITIONAL_OR_KEYWORD,
-                              default=Depends(get_pg), annotation=PG)
+        remove_args=('pg', 'self', *depends),
+        append_args=[
+            Parameter('pg', Parameter.POSITIONAL_OR_KEYWORD, default=Depends(get_pg), annotation=PG),
+            *(Parameter(name, Parameter.POSITIONAL_OR_KEYWORD, default=Depends(dependency))
+              for name, dependency in depends.items())
+        ]
     )
     def init_service(*args, **kwargs):
         return service_class(*args, **kwargs)
@@ -28,6 +45,26 @@ def service_depends(service_class):
     return Depends(init_service)
 
 
+def inline_schema(model: type[BaseModel]) -> dict[str, Any]:
+    """Model json schema with inlined definitions (for openapi_extra)."""
+    schema = model.schema()
+    definitions = schema.pop('definitions', {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            ref = node.get('$ref', '')
+            if ref.startswith('#/definitions/'):
+                return resolve(definitions[ref.removeprefix('#/definitions/')])
+            return {key: resolve(val) for key, val in node.items()}
+
+        if isinstance(node, list):
+            return [resolve(val) for val in node]
+
+        return node
+
+    return resolve(schema)
+
+
 router = APIRouter(
     responses={
         status.HTTP_400_BAD_REQUEST: {'model': models.Error},
@@ -41,8 +78,18 @@ node_router = APIRouter(
 )
 
 
-@router.post(url_paths.IMPORTS, response_class=Response)
-async def imports(service: ImportService = service_depends(ImportService)):
+# body is parsed by models.parse_request_import, so its schema is set explicitly
+@router.post(
+    url_paths.IMPORTS,
+    response_class=Response,
+    openapi_extra={
+        'requestBody': {
+            'content': {'application/json': {'schema': inline_schema(models.RequestImport)}},
+            'required': True
+        }
+    }
+)
+async def imports(service: ImportService = service_depends(ImportService, data=get_request_import)):
     await service.execute_post_import()
     return Response()
 
@@ -63,7 +110,7 @@ async def delete_node(service: NodeImportService = service_depends(NodeImportSer
 )
 async def node_tree(service: NodeService = service_depends(NodeService)):
     tree = await service.get_node()
-    return ORJSONResponse(tree.dict(by_alias=True))
+    return ORJSONResponse(tree.json_dict())
 
 
 @router.get(
@@ -0,0 +1,132 @@
+"""Integer node keys
+
+Revision ID: 16991dcc48b6
+Revises: 7997d569203d
+Create Date: 2026-10-19 14:21:07.903512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '16991dcc48b6'
+down_revision = '7997d569203d'
+branch_labels = None
+depends_on = None
+
+# table, string id column, key column
+NODE_COLUMNS = (
+    ('folders', 'id', 'key'),
+    ('files', 'id', 'key'),
+    ('folder_history', 'folder_id', 'folder_key'),
+    ('file_history', 'file_id', 'file_key'),
+)
+
+# table, primary key columns (string ids version)
+PRIMARY_KEYS = (
+    ('folders', ('id',)),
+    ('files', ('id',)),
+    ('folder_history', ('import_id', 'folder_id')),
+    ('file_history', ('import_id', 'file_id')),
+)
+
+# name, source table, columns, referent table, referent columns, is parent FK
+FOREIGN_KEYS = (
+    ('fk__folders__parent_id__folders', 'folders', 'parent_id', 'folders', 'id', True),
+    ('fk__files__parent_id__folders', 'files', 'parent_id', 'folders', 'id', True),
+    ('fk__folder_history__folder_id__folders', 'folder_history', 'folder_id', 'folders', 'id', False),
+    ('fk__file_history__file_id__files', 'file_history', 'file_id', 'files', 'id', False),
+)
+
+KEY_FOREIGN_KEYS = (
+    ('fk__folders__key__node_keys', 'folders', 'key', 'node_keys', 'key', False),
+    ('fk__files__key__node_keys', 'files', 'key', 'node_keys', 'key', False),
+    ('fk__folders__parent_key__folders', 'folders', 'parent_key', 'folders', 'key', True),
+    ('fk__files__parent_key__folders', 'files', 'parent_key', 'folders', 'key', True),
+    ('fk__folder_history__folder_key__folders', 'folder_history', 'folder_key', 'folders', 'key', False),
+    ('fk__file_history__file_key__files', 'file_history', 'file_key', 'files', 'key', False),
+)
+
+
+def _key_column(column: str) -> str:
+    return {'id': 'key', 'folder_id': 'folder_key', 'file_id': 'file_key', 'parent_id': 'parent_key'}[column]
+
+
+def _create_foreign_keys(foreign_keys):
+    for name, source, column, referent, referent_column, is_parent in foreign_keys:
+        op.create_foreign_key(
+            name, source, referent, [column], [referent_column], ondelete='CASCADE',
+            **(dict(deferrable=True, initially='DEFERRED') if is_parent else {})
+        )
+
+
+def _drop_foreign_keys(foreign_keys):
+    for name, source, *_ in foreign_keys:
+        op.drop_constraint(name, source, type_='foreignkey')
+
+
+def upgrade() -> None:
+    op.create_table('node_keys',
+                    sa.Column('key', sa.BigInteger(), nullable=False),
+                    sa.Column('id', sa.String(), nullable=False),
+                    sa.PrimaryKeyConstraint('key', name=op.f('pk__node_keys')),
+                    sa.UniqueConstraint('id', name=op.f('uq__node_keys__id'))
+                    )
+
+    # history parents may be already deleted folders, their keys are kept as well
+    op.execute('''
+        INSERT INTO node_keys (id)
+        SELECT id FROM folders UNION SELECT id FROM files
+        UNION SELECT parent_id FROM folder_history WHERE parent_id IS NOT NULL
+        UNION SELECT parent_id FROM file_history WHERE parent_id IS NOT NULL
+        ORDER BY 1
+    ''')
+
+    for table, id_column, key_column in NODE_COLUMNS:
+        op.add_column(table, sa.Column(key_column, sa.BigInteger()))
+        op.add_column(table, sa.Column('parent_key', sa.BigInteger()))
+        op.execute(f'''
+            UPDATE {table} t SET
+                {key_column} = (SELECT key FROM node_keys WHERE id = t.{id_column}),
+                parent_key = (SELECT key FROM node_keys WHERE id = t.parent_id)
+        ''')
+
+    _drop_foreign_keys(FOREIGN_KEYS)
+
+    for table, columns in PRIMARY_KEYS:
+        op.drop_constraint(f'pk__{table}', table, type_='primary')
+        op.alter_column(table, _key_column(columns[-1]), nullable=False)
+        op.create_primary_key(f'pk__{table}', table, [_key_column(c) if c != 'import_id' else c for c in columns])
+
+    for table, id_column, _ in NODE_COLUMNS:
+        op.drop_column(table, id_column)
+        op.drop_column(table, 'parent_id')
+
+    _create_foreign_keys(KEY_FOREIGN_KEYS)
+
+
+def downgrade() -> None:
+    for table, id_column, key_column in NODE_COLUMNS:
+        op.add_column(table, sa.Column(id_column, sa.String()))
+        op.add_column(table, sa.Column('parent_id', sa.String()))
+        op.execute(f'''
+            UPDATE {table} t SET
+                {id_column} = (SELECT id FROM node_keys WHERE key = t.{key_column}),
+                parent_id = (SELECT id FROM node_keys WHERE key = t.parent_key)
+        ''')
+
+    _drop_foreign_keys(KEY_FOREIGN_KEYS)
+
+    for table, columns in PRIMARY_KEYS:
+        op.drop_constraint(f'pk__{table}', table, type_='primary')
+        op.alter_column(table, columns[-1], nullable=False)
+        op.create_primary_key(f'pk__{table}', table, list(columns))
+
+    for table, id_column, key_column in NODE_COLUMNS:
+        op.drop_column(table, key_column)
+        op.drop_column(table, 'parent_key')
+
+    _create_foreign_keys(FOREIGN_KEYS)
+
+    op.drop_table('node_keys')
@@ -0,0 +1,31 @@
+"""Deferrable parent_id foreign keys
+
+Revision ID: 7997d569203d
+Revises: 63caaf70b406
+Create Date: 2026-10-19 12:04:31.518274
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7997d569203d'
+down_revision = '63caaf70b406'
+branch_labels = None
+depends_on = None
+
+PARENT_FOREIGN_KEYS = (
+    ('folders', 'fk__folders__parent_id__folders'),
+    ('files', 'fk__files__parent_id__folders'),
+)
+
+
+def upgrade() -> None:
+    # ALTER CONSTRAINT doesn't revalidate existent rows, unlike drop and create
+    for table, constraint in PARENT_FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE {table} ALTER CONSTRAINT {constraint} DEFERRABLE INITIALLY DEFERRED')
+
+
+def downgrade() -> None:
+    for table, constraint in PARENT_FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE {table} ALTER CONSTRAINT {constraint} NOT DEFERRABLE')
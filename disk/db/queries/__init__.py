@@ -3,3 +3,4 @@ from typing import Iterable
 from .item_table_queries import FolderQuery, FileQuery, QueryT
 
 Ids = Iterable[str] | str | None
+Keys = Iterable[int] | int | None
@@ -2,12 +2,12 @@ from datetime import datetime
 from enum import IntEnum
 from typing import Any
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, exists, or_
 
-from disk.db.schema import imports_table, queue_table, files_table, folders_table
-from . import Ids
+from disk.db.schema import imports_table, queue_table, files_table, folders_table, node_keys_table
+from . import Keys
 from .item_table_queries import FileQuery, FolderQuery
-from .tools import ids_condition, build_columns
+from .tools import keys_condition, build_columns
 
 
 def insert_import_auto_id(date: datetime):
@@ -34,8 +34,43 @@ def clear_queue():
     return queue_table.delete()
 
 
-def lock_ids_from_select(cte):
-    return select([func.pg_advisory_xact_lock(func.hashtextextended(cte.c.id, 0))])
+def select_node_key(node_id: str):
+    return select([node_keys_table.c.key]).where(node_keys_table.c.id == node_id)
+
+
+def insert_node_keys() -> str:
+    """Allocate keys for new external ids passed as $1 array. Existent ids are skipped."""
+    return f'INSERT INTO {node_keys_table.name} (id) SELECT unnest($1::VARCHAR[]) ON CONFLICT (id) DO NOTHING'
+
+
+def select_node_keys() -> str:
+    """(id, key) records for external ids passed as $1 array"""
+    return f'SELECT id, key FROM {node_keys_table.name} WHERE id = ANY($1::VARCHAR[])'
+
+
+def lock_keys() -> str:
+    """Lock keys passed as $1 array till the end of transaction"""
+    return 'SELECT pg_advisory_xact_lock(k) FROM unnest($1::BIGINT[]) AS k'
+
+
+def lock_ids() -> str:
+    """Lock keys of external ids passed as $1 array till the end of transaction. Unknown ids are skipped."""
+    return f'SELECT pg_advisory_xact_lock(key) FROM {node_keys_table.name} WHERE id = ANY($1::VARCHAR[])'
+
+
+def type_conflicts_exist(folder_keys: Keys, file_keys: Keys):
+    """Check in one query that no folder is a file in the db and vice versa."""
+    conditions = []
+    if folder_keys:
+        conditions.append(exists().where(keys_condition(files_table, folder_keys)))
+    if file_keys:
+        conditions.append(exists().where(keys_condition(folders_table, file_keys)))
+
+    return select([or_(*conditions)])
+
+
+def lock_keys_from_select(cte):
+    return select([func.pg_advisory_xact_lock(cte.c.key)])
 
 
 class Sign(IntEnum):
@@ -43,44 +78,44 @@ class Sign(IntEnum):
     SUB = -1
 
 
-def recursive_parents_with_size(file_ids: Ids, folder_ids: Ids, sign: Sign = Sign.ADD):
-    if file_ids:
+def recursive_parents_with_size(file_keys: Keys, folder_keys: Keys, sign: Sign = Sign.ADD):
+    if file_keys:
         # in this case string cols are parents cols, so child sizes need to be explicit
-        direct_parents = FileQuery.direct_parents(file_ids, ['id', 'parent_id', files_table.c.size])
+        direct_parents = FileQuery.direct_parents(file_keys, ['key', 'parent_key', files_table.c.size])
 
-        if folder_ids:
+        if folder_keys:
             direct_parents = direct_parents.union_all(
-                FolderQuery.direct_parents(folder_ids, ['id', 'parent_id', folders_table.c.size])
+                FolderQuery.direct_parents(folder_keys, ['key', 'parent_key', folders_table.c.size])
             )
 
-    elif folder_ids:
-        direct_parents = FolderQuery.direct_parents(folder_ids, ['id', 'parent_id', folders_table.c.size])
+    elif folder_keys:
+        direct_parents = FolderQuery.direct_parents(folder_keys, ['key', 'parent_key', folders_table.c.size])
 
     else:
-        raise ValueError('file_ids or folder_ids should exists')
+        raise ValueError('file_keys or folder_keys should exists')
 
     direct_parents = direct_parents.alias()
 
     parents_cte = \
         select([
-            direct_parents.c.id,
-            direct_parents.c.parent_id,
+            direct_parents.c.key,
+            direct_parents.c.parent_key,
             func.sum(sign * direct_parents.c.size).label('size')
         ]). \
-        group_by(direct_parents.c.id, direct_parents.c.parent_id).cte(recursive=True)
+        group_by(direct_parents.c.key, direct_parents.c.parent_key).cte(recursive=True)
 
     folders_alias = folders_table.alias()
     parents_alias = parents_cte.alias()
 
-    join_condition = (folders_alias.c.id == parents_alias.c.parent_id)
-    if sign == Sign.SUB and folder_ids:
+    join_condition = (folders_alias.c.key == parents_alias.c.parent_key)
+    if sign == Sign.SUB and folder_keys:
         # if two nodes (one child of another) was moved from one branch.
-        join_condition &= ~ ids_condition(parents_alias, folder_ids)
+        join_condition &= ~ keys_condition(parents_alias, folder_keys)
 
     parents_recursive = parents_cte.union_all(
         select([
-            folders_alias.c.id,
-            folders_alias.c.parent_id,
+            folders_alias.c.key,
+            folders_alias.c.parent_key,
             parents_alias.c.size
         ]).
         select_from(folders_alias.join(parents_alias, join_condition))
@@ -88,42 +123,42 @@ def recursive_parents_with_size(file_ids: Ids, folder_ids: Ids, sign: Sign = Sig
 
     all_parents = \
         select(
-            [parents_recursive.c.id,
+            [parents_recursive.c.key,
              func.sum(parents_recursive.c.size).label('size')]
         ). \
         select_from(parents_recursive). \
-        group_by(parents_recursive.c.id)
+        group_by(parents_recursive.c.key)
 
     return all_parents
 
 
-def update_parent_sizes(file_ids: Ids, folder_ids: Ids, import_id: int, sign: Sign = Sign.ADD):
+def update_parent_sizes(file_keys: Keys, folder_keys: Keys, import_id: int, sign: Sign = Sign.ADD):
 
-    select_q = recursive_parents_with_size(file_ids, folder_ids, sign).alias()
+    select_q = recursive_parents_with_size(file_keys, folder_keys, sign).alias()
 
-    query = folders_table.update().where(folders_table.c.id == select_q.c.id).values(
+    query = folders_table.update().where(folders_table.c.key == select_q.c.key).values(
         size=select_q.c.size + folders_table.c.size, import_id=import_id)
 
     return query
 
 
-def folders_with_recursive_parents_cte(folder_ids: Ids, child_file_ids: Ids, columns: list[str | Any] = None):
+def folders_with_recursive_parents_cte(folder_keys: Keys, child_file_keys: Keys, columns: list[str | Any] = None):
     """
     Select folders records:
-        - with ids belongs to folder_ids,
-        - direct parents of files with ids belongs to child_file_ids
+        - with keys belongs to folder_keys,
+        - direct parents of files with keys belongs to child_file_keys
         - and all recursive parents of folders mentioned above
     """
-    if folder_ids:
-        direct_parents = FolderQuery.select(folder_ids, columns)
-        if child_file_ids:
-            files_parents = FileQuery.direct_parents(child_file_ids, columns)
+    if folder_keys:
+        direct_parents = FolderQuery.select(folder_keys, columns)
+        if child_file_keys:
+            files_parents = FileQuery.direct_parents(child_file_keys, columns)
             direct_parents = files_parents.union_all(direct_parents)
 
-    elif child_file_ids:
-        direct_parents = FileQuery.direct_parents(child_file_ids, columns)
+    elif child_file_keys:
+        direct_parents = FileQuery.direct_parents(child_file_keys, columns)
     else:
-        raise ValueError('file_ids or folder_ids should be non empty')
+        raise ValueError('file_keys or folder_keys should be non empty')
 
     direct_parents = direct_parents.alias().select().distinct().cte(recursive=True)
 
@@ -132,7 +167,7 @@ def folders_with_recursive_parents_cte(folder_ids: Ids, child_file_ids: Ids, col
 
     parent_folders = direct_parents.union(
         select(build_columns(folders_alias, columns)).
-        where(folders_alias.c.id == included_alias.c.parent_id)
+        where(folders_alias.c.key == included_alias.c.parent_key)
     )
 
     return parent_folders
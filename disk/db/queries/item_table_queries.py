@@ -1,12 +1,13 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Iterable, Any, TypeVar
+from typing import Iterable, Any, TypeVar, Sequence
 
-from sqlalchemy import Table, select, func, exists, literal_column, String
+from sqlalchemy import Table, select, func, exists, literal, literal_column, String
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.sql.elements import Null
 
 from disk.db.schema import files_table, folder_history, folders_table, file_history, imports_table, ItemType
-from .tools import build_columns, ids_condition
+from .tools import build_columns, keys_condition, with_node_ids
 
 
 class ItemQueryBase(ABC):
@@ -17,34 +18,71 @@ class ItemQueryBase(ABC):
     node_type: ItemType
 
     @classmethod
-    def select(cls, ids: Iterable[str] | str, columns: list[str] | None = None):
+    def select(cls, keys: Iterable[int] | int, columns: list[str] | None = None):
         columns = build_columns(cls.table, columns)
-        return select(columns).where(ids_condition(cls.table, ids))
+        return select(columns).where(keys_condition(cls.table, keys))
 
     @classmethod
-    def select_node_with_date(cls, node_id: str, columns: list[str] | None = None):
+    def select_node_with_date(cls, node_key: int, columns: list[str] | None = None):
         """
         Select node record with additional field date.
         """
         return select(build_columns(cls.table, columns) + [imports_table.c.date]). \
             select_from(cls.table.join(imports_table)). \
-            where(cls.table.c.id == node_id)
+            where(cls.table.c.key == node_key)
 
     @classmethod
     def insert(cls, values: list[dict[str, Any]]):
         return cls.table.insert().values(values)
 
     @classmethod
-    def update_many(cls, mapping: dict[str, str]):
-        id_param = mapping['id']
+    def _unnest(cls, names: Sequence[str]) -> str:
+        """unnest clause for columns passed as arrays in $1...$n parameters"""
+        dialect = postgresql.dialect()
+        arrays = ', '.join(
+            f'${i}::{cls.table.c[name].type.compile(dialect=dialect)}[]'
+            for i, name in enumerate(names, start=1)
+        )
+        return f'unnest({arrays}) AS u({", ".join(names)})'
+
+    @classmethod
+    def upsert_from_arrays(cls, names: Sequence[str], write_history: bool = False) -> str:
+        """
+        Insert or update by id rows passed as column arrays in $1...$n parameters.
+        import_id is the last $n+1 parameter.
+        Other columns of new rows get their scalar defaults (e.g. folders size), existent rows keep them.
+        names must start with 'key'.
+        If write_history, old records of updated rows are copied to the history table by the same statement
+        (data-modifying CTE sees the table before upsert).
+        """
+        defaults = {
+            col.name: literal(col.default.arg).compile(
+                dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True})
+            for col in cls.table.columns
+            if col.name not in names and col.default is not None and col.default.is_scalar
+        }
+        cols = ', '.join([*names, *defaults])
+        values = ', '.join([*names, *map(str, defaults.values())])
+        updates = ', '.join(f'{name} = EXCLUDED.{name}' for name in [*names[1:], 'import_id'])
+
+        query = f'INSERT INTO {cls.table.name} ({cols}, import_id) ' \
+                f'SELECT {values}, ${len(names) + 1}::INTEGER FROM {cls._unnest(names)} ' \
+                f'ON CONFLICT (key) DO UPDATE SET {updates}'
+
+        if write_history:
+            query = f'WITH history AS ({cls._history_from_keys_param()}) {query}'
 
-        cols = ', '.join(f'{key}={val}' for key, val in mapping.items()
-                         if key != 'id')
+        return query
 
-        return f'UPDATE {cls.table.name} SET {cols} WHERE id = {id_param}'
+    @classmethod
+    def _history_from_keys_param(cls) -> str:
+        """Insert into history table records with key in $1 array parameter."""
+        return f'INSERT INTO {cls.history_table.name} ({", ".join(c.name for c in cls.history_table.columns)}) ' \
+               f'SELECT {", ".join(c.name for c in cls.table.columns)} FROM {cls.table.name} ' \
+               f'WHERE key = ANY($1::BIGINT[])'
 
     @classmethod
-    def direct_parents(cls, ids: Iterable[str] | str, columns: list[str | None] | None = None):
+    def direct_parents(cls, keys: Iterable[int] | int, columns: list[str | None] | None = None):
         """
         Select direct parents. May contain duplicate records!
         It's necessary for collecting children sizes in FolderQuery.update_parent_sizes query.
@@ -58,9 +96,9 @@ class ItemQueryBase(ABC):
             select_from(
                 folders_alias.join(
                     cls.table,
-                    cls.table.c.parent_id == folders_alias.c.id
+                    cls.table.c.parent_key == folders_alias.c.key
                 )
-            ).where(ids_condition(cls.table, ids))
+            ).where(keys_condition(cls.table, keys))
 
         return parents
 
@@ -69,65 +107,70 @@ class ItemQueryBase(ABC):
         return cls.history_table.insert().from_select(cls.history_table.columns, select_q)
 
     @classmethod
-    def exist(cls, ids: str | Iterable[str]):
-        return select([exists().where(ids_condition(cls.table, ids))])
+    def exist(cls, keys: int | Iterable[int]):
+        return select([exists().where(keys_condition(cls.table, keys))])
 
     @classmethod
-    def delete(cls, node_id: str):
-        return cls.table.delete().where(cls.table.c.id == node_id)
+    def delete(cls, node_key: int):
+        return cls.table.delete().where(cls.table.c.key == node_key)
 
     # note: this query can retrieve duplicates.
-    #  For now it's not a problem, because it is used only for а single id
+    #  For now it's not a problem, because it is used only for а single key
     #  and there can be no duplicates
     @classmethod
-    def recursive_parents(cls, ids: str | Iterable[str], columns: list[str] = None):
-        direct_parents = cls.direct_parents(ids, columns).cte(recursive=True)
+    def recursive_parents(cls, keys: int | Iterable[int], columns: list[str] = None):
+        direct_parents = cls.direct_parents(keys, columns).cte(recursive=True)
 
         folders_alias = folders_table.alias()
         included_alias = direct_parents.alias()
 
         parent_folders = direct_parents.union_all(
             select(build_columns(folders_alias, columns)).
-            where(folders_alias.c.id == included_alias.c.parent_id)
+            where(folders_alias.c.key == included_alias.c.parent_key)
         )
 
         return parent_folders
 
     @classmethod
-    def select_nodes_union_history_in_daterange(cls, date_start: datetime, date_end: datetime,
-                                                ids: Iterable[str] | str = None, closed=True):
+    def _union_history_in_daterange(cls, date_start: datetime, date_end: datetime,
+                                    keys: Iterable[int] | int = None, closed=True):
         union_cte = cls.table.select().union_all(cls.history_table.select()).cte()
 
-        cols = set(union_cte.columns) - {union_cte.c.import_id}
+        cols = [c for c in union_cte.columns if c.name != 'import_id']
 
         condition = (imports_table.c.date <= date_end) if closed else (imports_table.c.date < date_end)
         condition &= (date_start <= imports_table.c.date)
-        if ids:
-            condition &= ids_condition(union_cte, ids)
+        if keys:
+            condition &= keys_condition(union_cte, keys)
 
         return select(build_columns(union_cte, cols) + [imports_table.c.date]). \
             select_from(union_cte.join(imports_table)). \
             where(condition)
 
+    @classmethod
+    def select_nodes_union_history_in_daterange(cls, date_start: datetime, date_end: datetime,
+                                                keys: Iterable[int] | int = None, closed=True):
+        return with_node_ids(cls._union_history_in_daterange(date_start, date_end, keys, closed))
+
     @classmethod
     def select_updates_daterange(cls, date_start: datetime, date_end: datetime,
-                                 ids: Iterable[str] | str = None, closed=True):
-        q = cls.select_nodes_union_history_in_daterange(date_start, date_end, ids, closed).cte()
+                                 keys: Iterable[int] | int = None, closed=True):
+        q = cls._union_history_in_daterange(date_start, date_end, keys, closed).cte()
 
-        q2 = select([q.c.id, func.max(q.c.date).label('date')]).group_by(q.c.id).alias()
+        q2 = select([q.c.key, func.max(q.c.date).label('date')]).group_by(q.c.key).alias()
 
-        q3 = select(q.columns).select_from(q.join(q2, (q.c.id == q2.c.id) & (q.c.date == q2.c.date))).distinct()
-        return q3
+        q3 = select(q.columns).select_from(q.join(q2, (q.c.key == q2.c.key) & (q.c.date == q2.c.date))).distinct()
+        return with_node_ids(q3)
 
     @classmethod
     @abstractmethod
-    def get_node_select_query(cls, node_id: str):
+    def get_node_select_query(cls, node_key: int):
         """:return: select query for get node API method"""
 
     @classmethod
-    def xact_advisory_lock_parent_ids(cls, ids: str | Iterable[str]):
-        cte = cls.recursive_parents(ids)
-        return select([func.pg_advisory_xact_lock(func.hashtextextended(cte.c.id, 0))])
+    def xact_advisory_lock_parent_keys(cls, keys: int | Iterable[int]):
+        cte = cls.recursive_parents(keys)
+        return select([func.pg_advisory_xact_lock(cte.c.key)])
 
 
 QueryT = TypeVar('QueryT', bound=ItemQueryBase)
@@ -141,11 +184,11 @@ class FolderQuery(ItemQueryBase):
     node_type = ItemType.FOLDER
 
     @classmethod
-    def folder_tree_cte(cls, folder_id: str):
-        cols = ['id', 'parent_id', 'size', Null().label('url'), imports_table.c.date]
+    def folder_tree_cte(cls, folder_key: int):
+        cols = ['key', 'parent_key', 'size', Null().label('url'), imports_table.c.date]
 
         top_folder = cls.select_node_with_date(
-            folder_id,
+            folder_key,
             cols
         ).cte(recursive=True)
 
@@ -154,7 +197,7 @@ class FolderQuery(ItemQueryBase):
             select_from(
                 cls.table.join(imports_table).join(
                     top_folder,
-                    cls.table.c.parent_id == top_folder.c.id
+                    cls.table.c.parent_key == top_folder.c.key
                 )
             )
         )
@@ -162,10 +205,10 @@ class FolderQuery(ItemQueryBase):
         return cte
 
     @classmethod
-    def select_folder_tree(cls, folder_id: str):
-        tree_cte = cls.folder_tree_cte(folder_id)
+    def select_folder_tree(cls, folder_key: int):
+        tree_cte = cls.folder_tree_cte(folder_key)
 
-        file_cols = ['id', 'parent_id', 'size', 'url', imports_table.c.date,
+        file_cols = ['key', 'parent_key', 'size', 'url', imports_table.c.date,
                      literal_column(f"'{ItemType.FILE.value}'", String).label('type')]
 
         folder_cols = tree_cte.c + [literal_column(f"'{ItemType.FOLDER.value}'", String).label('type')]
@@ -177,11 +220,11 @@ class FolderQuery(ItemQueryBase):
             select_from(files_table.join(imports_table).join(tree_cte))
         )
 
-        return query
+        return with_node_ids(query)
 
     @classmethod
-    def get_node_select_query(cls, node_id: str):
-        return cls.select_folder_tree(node_id)
+    def get_node_select_query(cls, node_key: int):
+        return cls.select_folder_tree(node_key)
 
 
 class FileQuery(ItemQueryBase):
@@ -192,7 +235,7 @@ class FileQuery(ItemQueryBase):
     node_type = ItemType.FILE
 
     @classmethod
-    def get_node_select_query(cls, node_id: str):
-        columns = ['id', 'parent_id', 'url', 'size',
+    def get_node_select_query(cls, node_key: int):
+        columns = ['key', 'parent_key', 'url', 'size',
                    literal_column(f"'{cls.node_type.value}'", String).label('type')]
-        return cls.select_node_with_date(node_id, columns)
+        return with_node_ids(cls.select_node_with_date(node_key, columns))
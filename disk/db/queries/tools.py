@@ -1,6 +1,9 @@
 from typing import Iterable, Any
 
-from sqlalchemy import Table
+from sqlalchemy import Table, select
+from sqlalchemy.sql import Alias
+
+from disk.db.schema import node_keys_table
 
 
 def build_columns(table: Table, columns: Iterable[str | Any] | None = None):
@@ -11,8 +14,27 @@ def build_columns(table: Table, columns: Iterable[str | Any] | None = None):
         return [table.c[name] if isinstance(name, str) else name for name in columns]
 
 
-def ids_condition(table: Table, ids: Iterable[str] | str):
-    if type(ids) == str:
-        return table.c.id == ids
+def keys_condition(table: Table | Alias, keys: Iterable[int] | int):
+    if type(keys) == int:
+        return table.c.key == keys
+
+    return table.c.key.in_(keys)
+
+
+def with_node_ids(query):
+    """
+    Select from query with key and parent_key columns.
+    Keys are replaced with external string ids (id and parent_id columns), other columns are kept.
+    """
+    query = query.alias()
+    node = node_keys_table.alias()
+    parent = node_keys_table.alias()
+
+    columns = [node.c.id.label('id'), parent.c.id.label('parent_id')]
+    columns += [c for c in query.c if c.name not in ('key', 'parent_key')]
 
-    return table.c.id.in_(ids)
+    return select(columns).select_from(
+        query.
+        join(node, node.c.key == query.c.key).
+        outerjoin(parent, parent.c.key == query.c.parent_key)
+    )
@@ -1,11 +1,13 @@
 from datetime import datetime
 from typing import Iterable
 
+from asyncpg import ForeignKeyViolationError
 from asyncpgsa.connection import SAConnection
 
-from disk.db.queries import import_queries, FolderQuery, Ids
+from disk.db.queries import import_queries, FolderQuery, Keys
 from disk.utils import QueueWorker
 from .base import BaseRepository
+from .exceptions import ParentNotFoundError, ModelValidationError
 
 
 class ImportRepository(BaseRepository):
@@ -36,88 +38,115 @@ class ImportRepository(BaseRepository):
     def release_queue(self):
         QueueWorker.release_queue(self.import_id)
 
+    async def get_node_keys(self, ids: Iterable[str]) -> dict[str, int]:
+        """
+        Internal keys of external ids. Keys for unknown ids are allocated.
+        Allocated keys are rolled back with the transaction, if import fails.
+        """
+        ids = list(ids)
+        await self.conn.execute(import_queries.insert_node_keys(), ids)
+        # separate statement sees keys inserted by concurrent transactions we had waited for
+        return dict(await self.conn.fetch(import_queries.select_node_keys(), ids))
+
+    async def lock_keys(self, keys: Iterable[int]):
+        await self.conn.execute(import_queries.lock_keys(), list(keys))
+
     async def lock_ids(self, ids: Iterable[str]):
-        query = 'VALUES '
-        query += ', '.join(
-            f"(pg_advisory_xact_lock(hashtextextended('{i}', 0)))"
-            for i in ids
-        )
-        await self.conn.execute(query)
+        await self.conn.execute(import_queries.lock_ids(), list(ids))
 
-    async def lock_branches(self, folder_ids: Ids, file_ids: Ids):
-        """locks old and new parent branches for given ids"""
+    async def lock_branches(self, folder_keys: Keys, file_keys: Keys):
+        """locks old and new parent branches for given keys"""
 
         cte = import_queries.folders_with_recursive_parents_cte(
-            folder_ids,
-            file_ids,
-            ['id', 'parent_id']
+            folder_keys,
+            file_keys,
+            ['key', 'parent_key']
         )
         await self.conn.execute(
-            import_queries.lock_ids_from_select(cte)
+            import_queries.lock_keys_from_select(cte)
         )
 
-    def acquire_locks_ctx(self, ids: Iterable[str]):
-        return AcquireLocksContext(self, ids)
+    async def check_type_conflicts(self, folder_keys: Keys, file_keys: Keys):
+        """Node type can't be changed by import"""
+        if await self.conn.fetchval(import_queries.type_conflicts_exist(folder_keys, file_keys)):
+            raise ModelValidationError('Some import folder ids are files in the db or vice versa')
+
+    def acquire_locks_ctx(self, keys: Iterable[int]):
+        return AcquireLocksContext(self, keys)
 
-    async def write_folders_history(self, folder_ids, file_ids):
+    async def write_folders_history(self, folder_keys: Keys, file_keys: Keys):
         """
         Write in folder_history table folder records:
-            1) with id in folder_ids
-            2) all recursive parents of folders with id in folder_ids
-            3) all recursive parents of files with id in file_ids
+            1) with key in folder_keys
+            2) all recursive parents of folders with key in folder_keys
+            3) all recursive parents of files with key in file_keys
         All records selecting in one recursive query.
         """
         cte = import_queries.folders_with_recursive_parents_cte(
-            folder_ids, file_ids
+            folder_keys, file_keys
         )
         insert_hist = FolderQuery.insert_history_from_select(cte.select())
         await self.conn.execute(insert_hist)
 
-    async def subtract_parent_sizes(self, folders_existent_ids: Ids, files_existent_ids: Ids):
-        if folders_existent_ids or files_existent_ids:
+    async def subtract_parent_sizes(self, folder_keys: Keys, file_keys: Keys):
+        """
+        Subtract sizes of nodes from their current parents.
+        New nodes keys can be passed too: they have no parents in the db yet, so they are just skipped.
+        """
+        if folder_keys or file_keys:
             query = import_queries.update_parent_sizes(
-                files_existent_ids,
-                folders_existent_ids,
+                file_keys,
+                folder_keys,
                 self.import_id,
                 import_queries.Sign.SUB
             )
             await self.conn.execute(query)
 
-    async def add_parent_sizes(self, file_ids: Ids, folder_ids: Ids):
+    async def add_parent_sizes(self, file_keys: Keys, folder_keys: Keys):
         query = import_queries.update_parent_sizes(
-            file_ids,
-            folder_ids,
+            file_keys,
+            folder_keys,
             self.import_id
         )
         await self.conn.execute(query)
 
+    async def check_parents_exist(self):
+        """
+        Run deferred parent FK checks now instead of at commit,
+        so missing parents are reported as ParentNotFoundError.
+        """
+        try:
+            await self.conn.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        except ForeignKeyViolationError as err:
+            raise ParentNotFoundError(err.detail or '')
+
 
 class AcquireLocksContext:
-    __slots__ = ('mdl', 'i', '_ids', '_branches_ids')
+    __slots__ = ('mdl', 'i', '_keys', '_branches_keys')
 
-    def __init__(self, mdl: ImportRepository, ids: Ids, i: int = 0):
+    def __init__(self, mdl: ImportRepository, keys: Keys, i: int = 0):
         self.mdl = mdl
         self.i = i
-        self._ids = ids
-        self._branches_ids = None
+        self._keys = keys
+        self._branches_keys = None
 
     @property
-    def branches_leaf_ids(self) -> tuple[Ids, Ids]:
-        return self._branches_ids
+    def branches_leaf_keys(self) -> tuple[Keys, Keys]:
+        return self._branches_keys
 
-    @branches_leaf_ids.setter
-    def branches_leaf_ids(self, value: tuple[Ids, Ids]):
-        """folder ids, file ids"""
-        self._branches_ids = value
+    @branches_leaf_keys.setter
+    def branches_leaf_keys(self, value: tuple[Keys, Keys]):
+        """folder keys, file keys"""
+        self._branches_keys = value
 
     async def __aenter__(self):
         await self.mdl.conn.execute('SELECT pg_advisory_lock($1)', self.i)
-        await self.mdl.lock_ids(self._ids)
+        await self.mdl.lock_keys(self._keys)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         try:
             if exc_type is None:
-                await self.mdl.lock_branches(*self.branches_leaf_ids)
+                await self.mdl.lock_branches(*self.branches_leaf_keys)
         finally:
             await self.mdl.conn.execute('SELECT pg_advisory_unlock($1)', self.i)
@@ -4,7 +4,7 @@ from asyncpg import Record
 from asyncpgsa.connection import SAConnection
 
 from disk.db.schema import ItemType
-from disk.db.queries import QueryT, FileQuery, FolderQuery
+from disk.db.queries import QueryT, FileQuery, FolderQuery, import_queries
 from .base import BaseInitRepository
 from .exceptions import ItemNotFoundError, ModelValidationError
 
@@ -15,9 +15,14 @@ class NodeRepository(BaseInitRepository):
         super().__init__(conn)
         self.node_id = node_id
 
+        self._node_key = None
         self._query = None
         self._node_type = None
 
+    @property
+    def node_key(self) -> int:
+        return self._node_key
+
     @property
     def query(self) -> type[QueryT]:
         return self._query
@@ -27,15 +32,19 @@ class NodeRepository(BaseInitRepository):
         return self._node_type
 
     async def init(self):
-        for self._query, self._node_type in zip([FileQuery, FolderQuery], ItemType):
-            node_exists = await self.conn.fetchval(self._query.exist(self.node_id))
-            if node_exists:
-                return
+        # keys of deleted nodes are kept, so node existence is checked in node tables anyway
+        self._node_key = await self.conn.fetchval(import_queries.select_node_key(self.node_id))
+
+        if self.node_key is not None:
+            for self._query, self._node_type in zip([FileQuery, FolderQuery], ItemType):
+                node_exists = await self.conn.fetchval(self._query.exist(self.node_key))
+                if node_exists:
+                    return
 
         raise ItemNotFoundError
 
     async def get_node(self) -> list[Record]:
-        res = await self.conn.fetch(self.query.get_node_select_query(self.node_id))
+        res = await self.conn.fetch(self.query.get_node_select_query(self.node_key))
         return res
 
     async def get_node_history(self, date_start: datetime, date_end: datetime) -> list[Record]:
@@ -43,14 +52,14 @@ class NodeRepository(BaseInitRepository):
             raise ModelValidationError
 
         query = self.query.select_nodes_union_history_in_daterange(
-            date_start, date_end, self.node_id, closed=False)
+            date_start, date_end, self.node_key, closed=False)
 
         return await self.conn.fetch(query)
 
     async def delete_node(self):
-        await self.conn.execute(self.query.delete(self.node_id))
+        await self.conn.execute(self.query.delete(self.node_key))
 
     async def write_parents_to_history(self):
-        parents = self.query.recursive_parents(self.node_id).select()
+        parents = self.query.recursive_parents(self.node_key).select()
         history_q = FolderQuery.insert_history_from_select(parents)
         await self.conn.execute(history_q)
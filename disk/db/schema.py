@@ -59,22 +59,34 @@ queue_table = Table(
 # )
 
 
+# Maps external string node ids to internal bigint keys.
+# Node tables and history use keys for all links and locks. Keys of deleted nodes are kept and reused on re-import.
+node_keys_table = Table(
+    'node_keys',
+    metadata,
+    Column('key', BigInteger, primary_key=True),
+    Column('id', String, nullable=False, unique=True)
+)
+
 folders_table = Table(
     'folders',
     metadata,
     Column('import_id', Integer, ForeignKey('imports.id')),
-    Column('id', String, primary_key=True),
-    Column('parent_id', String),
+    Column('key', BigInteger, ForeignKey('node_keys.key', ondelete='CASCADE'), primary_key=True, autoincrement=False),
+    Column('parent_key', BigInteger),
     Column('size', BigInteger, default=0),
-    ForeignKeyConstraint(('parent_id',), ('folders.id',), ondelete='CASCADE')
+    # parent FKs are checked at the end of import transaction, so nodes can be written in any order
+    ForeignKeyConstraint(('parent_key',), ('folders.key',), ondelete='CASCADE',
+                         deferrable=True, initially='DEFERRED')
 )
 
 files_table = Table(
     'files',
     metadata,
     Column('import_id', Integer, ForeignKey('imports.id')),
-    Column('id', String, primary_key=True),
-    Column('parent_id', String, ForeignKey('folders.id', ondelete='CASCADE')),
+    Column('key', BigInteger, ForeignKey('node_keys.key', ondelete='CASCADE'), primary_key=True, autoincrement=False),
+    Column('parent_key', BigInteger, ForeignKey('folders.key', ondelete='CASCADE',
+                                                deferrable=True, initially='DEFERRED')),
     Column('url', String(255), nullable=False),
     Column('size', BigInteger, nullable=False),
 )
@@ -83,8 +95,8 @@ folder_history = Table(
     'folder_history',
     metadata,
     Column('import_id', Integer, ForeignKey('imports.id'), primary_key=True),
-    Column('folder_id', String, ForeignKey('folders.id', ondelete='CASCADE'), primary_key=True),
-    Column('parent_id', String),
+    Column('folder_key', BigInteger, ForeignKey('folders.key', ondelete='CASCADE'), primary_key=True),
+    Column('parent_key', BigInteger),
     Column('size', BigInteger, default=0),
 )
 
@@ -92,8 +104,8 @@ file_history = Table(
     'file_history',
     metadata,
     Column('import_id', Integer, ForeignKey('imports.id'), primary_key=True),
-    Column('file_id', String, ForeignKey('files.id', ondelete='CASCADE'), primary_key=True),
-    Column('parent_id', String),
+    Column('file_key', BigInteger, ForeignKey('files.key', ondelete='CASCADE'), primary_key=True),
+    Column('parent_key', BigInteger),
     Column('url', String(255), nullable=False),
     Column('size', BigInteger, nullable=False),
 )
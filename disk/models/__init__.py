@@ -1,3 +1,5 @@
-from .node_tree import ResponseNodeTree, RequestNodeTree
+from .node_tree import ResponseNodeTree, TreeNode
 
 from .schemas import Error, ListResponseItem, RequestImport, ItemType, RequestItem
+from .parsers import parse_request_import
+from .import_batch import ImportBatch, NodeColumns
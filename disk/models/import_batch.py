@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Iterable
+
+from .schemas import RequestImport, RequestItem, ItemType
+
+FILE_COLUMNS = ('id', 'parent_id', 'url', 'size')
+FOLDER_COLUMNS = ('id', 'parent_id')
+
+
+class NodeColumns:
+    """
+    Parallel arrays of one type import items (id, parent_id, ... in `names` order).
+    Arrays are ready to be passed as db query parameters.
+    Items are kept in import order: parent FKs are deferred, so db doesn't need parents first.
+    """
+
+    __slots__ = ('node_type', 'names', 'columns')
+
+    def __init__(self, node_type: ItemType):
+        self.node_type = node_type
+        self.names = FOLDER_COLUMNS if node_type == ItemType.FOLDER else FILE_COLUMNS
+        self.columns: tuple[list[Any], ...] = tuple([] for _ in self.names)
+
+    @property
+    def ids(self) -> list[str]:
+        return self.columns[0]
+
+    @property
+    def parent_ids(self) -> list[str | None]:
+        return self.columns[1]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, *values: Any):
+        for column, value in zip(self.columns, values):
+            column.append(value)
+
+
+class ImportBatch:
+    """Column-oriented representation of import items, split by node type."""
+
+    __slots__ = ('date', 'files', 'folders', 'folder_ids_set')
+
+    def __init__(self, items: Iterable[RequestItem], date: datetime):
+        self.date = date
+        self.files = NodeColumns(ItemType.FILE)
+        self.folders = NodeColumns(ItemType.FOLDER)
+
+        for item in items:
+            if item.type == ItemType.FOLDER:
+                self.folders.append(item.id, item.parent_id)
+            else:
+                self.files.append(item.id, item.parent_id, item.url, item.size)
+
+        # all folder ids from import items id and parent_id fields diff None parent_id
+        self.folder_ids_set: set[str] = {*self.folders.ids, *self.folders.parent_ids, *self.files.parent_ids}
+        self.folder_ids_set.discard(None)
+
+    @classmethod
+    def from_request(cls, data: RequestImport) -> ImportBatch:
+        return cls(data.items, data.date)
+
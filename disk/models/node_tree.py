@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import Iterable, Mapping, Any, TypeVar
+from itertools import chain
+from typing import Iterable, Iterator, Mapping, Sequence, Any, TypeVar
 
-from .schemas import RequestItem, ItemType, ResponseItem, Item
+from .schemas import ItemType, ResponseItem, Item
 
 
 class NodeTree(Item):
@@ -24,16 +25,14 @@ class NodeTree(Item):
             if type(node) != cls:
                 node = cls.construct(**node.dict(by_alias=True))
 
-            ids |= {node.id}
+            ids.add(node.id)
 
             if node.type == ItemType.FOLDER:
                 node.children = id_children_map[node.id]
 
             id_children_map[node.parent_id].append(node)
 
-        outer_ids = set(id_children_map) - ids
-        top_nodes = sum((children for id_, children in id_children_map.items() if id_ in outer_ids), [])
-        return top_nodes
+        return _top_nodes(id_children_map, ids)
 
 
 NodeTreeT = TypeVar('NodeTreeT', bound=NodeTree)
@@ -46,19 +45,86 @@ class ResponseNodeTree(ResponseItem, NodeTree):
     """
 
 
-class RequestNodeTree(RequestItem, NodeTree):
+class TreeNode:
+    """
+    Lightweight tree node without pydantic validation.
+    Records from db are trusted, so building a big tree costs one plain object per row.
+    """
+
+    __slots__ = ('id', 'parent_id', 'type', 'url', 'size', 'date', 'children')
+
+    def __init__(self, id_: str, parent_id: str | None, type_: ItemType | str,
+                 url: str | None = None, size: int | None = None, date: Any = None):
+        self.id = id_
+        self.parent_id = parent_id
+        self.type = ItemType(type_)
+        self.url = url
+        self.size = size
+        self.date = date
+        self.children: list[TreeNode] | None = [] if self.type == ItemType.FOLDER else None
 
-    def flatten_nodes(self, import_id: int) -> list[dict[str, Any]]:
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> list[TreeNode]:
         """
-        Return nodes list for insertion records in db.
-        Children field not included.
-        Any child always will be after his parent.
+        Link nodes in one pass.
+        :param rows: tuples (id, parent_id, type[, url, size, date]) in any order.
+        :return: top nodes (whose parents are not in rows).
         """
+        id_children_map: dict[str | None, list[TreeNode]] = defaultdict(list)
 
-        def get_dict(node):
-            yield node.db_dict(import_id)
-            if node.children:
-                for child in node.children:
-                    yield from get_dict(child)
+        ids = set()
+        for row in rows:
+            node = cls(*row)
+            ids.add(node.id)
 
-        return list(get_dict(self))
+            if node.children is not None:
+                node.children = id_children_map[node.id]
+
+            id_children_map[node.parent_id].append(node)
+
+        return _top_nodes(id_children_map, ids)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]]) -> list[TreeNode]:
+        return cls.from_rows(
+            (rec['id'], rec['parent_id'], rec['type'], rec['url'], rec['size'], rec['date'])
+            for rec in records
+        )
+
+    def walk(self) -> Iterator[TreeNode]:
+        """Iterate over subtree nodes. Any child always will be after his parent."""
+        nodes = [self]
+        for node in nodes:
+            yield node
+            if node.children:
+                nodes.extend(node.children)
+
+    def _json_fields(self) -> dict[str, Any]:
+        return {
+            'id': self.id,
+            'parentId': self.parent_id,
+            'type': self.type.value,
+            'url': self.url,
+            'size': self.size,
+            'date': self.date,
+            'children': None
+        }
+
+    def json_dict(self) -> dict[str, Any]:
+        """Nested dict with API field names, same as ResponseNodeTree.dict(by_alias=True)"""
+        root = self._json_fields()
+        stack = [(self, root)]
+
+        while stack:
+            node, node_dict = stack.pop()
+            if node.children is not None:
+                node_dict['children'] = [child._json_fields() for child in node.children]
+                stack.extend(zip(node.children, node_dict['children']))
+
+        return root
+
+
+def _top_nodes(id_children_map: Mapping[str | None, list], ids: set[str]) -> list:
+    return list(chain.from_iterable(
+        children for id_, children in id_children_map.items() if id_ not in ids
+    ))
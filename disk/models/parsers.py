@@ -0,0 +1,98 @@
+from typing import Any
+
+import orjson
+from pydantic.datetime_parse import parse_datetime
+
+from .schemas import RequestImport, RequestItem, ItemType
+
+_IMPORT_KEYS = frozenset({'items', 'updateDate'})
+_ITEM_KEYS = frozenset({'id', 'parentId', 'type', 'url', 'size'})
+_ITEM_TYPES = {t.value: t for t in ItemType}
+_URL_MAX_LENGTH = 255
+_ITEM_FIELDS = frozenset(RequestItem.__fields__)
+
+
+def parse_request_import(raw: bytes | str) -> RequestImport:
+    """
+    High-throughput RequestImport parser.
+
+    Checks the whole import column by column and constructs models without validation.
+    Only the data that pydantic would accept as is passes the fast path.
+    Anything else (invalid data, values that need coercion, etc.) is parsed by RequestImport itself,
+    so the result and the raised ValidationError are the same as RequestImport.parse_raw gives.
+    """
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return RequestImport.parse_raw(raw)
+
+    request_import = _fast_parse(data)
+    if request_import is None:
+        return RequestImport.parse_obj(data)
+
+    return request_import
+
+
+def _fast_parse(data: Any) -> RequestImport | None:
+    if type(data) is not dict or data.keys() != _IMPORT_KEYS:
+        return None
+
+    items = data['items']
+    if type(items) is not list:
+        return None
+
+    try:
+        date = parse_datetime(data['updateDate'])
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+    columns = _item_columns(items)
+    if columns is None:
+        return None
+
+    return RequestImport.construct(
+        items=[_construct_item(*values) for values in zip(*columns)],
+        date=date
+    )
+
+
+def _construct_item(id_: str, parent_id: str | None, type_: ItemType, url: str | None, size: int | None):
+    """Same as RequestItem.construct for all fields, but without its per field overhead."""
+    item = object.__new__(RequestItem)
+    object.__setattr__(item, '__dict__', {
+        'id': id_, 'parent_id': parent_id, 'type': type_, 'url': url, 'size': size
+    })
+    object.__setattr__(item, '__fields_set__', set(_ITEM_FIELDS))
+    return item
+
+
+def _item_columns(items: list[Any]) -> tuple[list, ...] | None:
+    if not all(type(item) is dict and item.keys() <= _ITEM_KEYS for item in items):
+        return None
+
+    ids = [item.get('id') for item in items]
+    if not all(type(i) is str and i for i in ids) or len(set(ids)) != len(ids):
+        return None
+
+    parent_ids = [item.get('parentId') for item in items]
+    if not all(i is None or type(i) is str and i for i in parent_ids):
+        return None
+
+    types = [item.get('type') for item in items]
+    types = [_ITEM_TYPES.get(t) if type(t) is str else None for t in types]
+    if None in types:
+        return None
+
+    urls = [item.get('url') for item in items]
+    sizes = [item.get('size') for item in items]
+
+    for type_, url, size in zip(types, urls, sizes):
+        if type_ == ItemType.FOLDER:
+            if url is not None or size is not None:
+                return None
+
+        elif (type(url) is not str or not 0 < len(url) <= _URL_MAX_LENGTH
+              or type(size) is not int or size <= 0):
+            return None
+
+    return ids, parent_ids, types, urls, sizes
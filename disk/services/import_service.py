@@ -1,15 +1,15 @@
-from functools import reduce
+from typing import Mapping
 
 from asyncpgsa import PG
 from asyncpgsa.connection import SAConnection
 
 from disk.db.repositories import FileListRepository, FolderListRepository
-from disk.models import RequestImport, ItemType
+from disk.models import RequestImport, ImportBatch
 from .base import BaseImportService
 
 
 class ImportService(BaseImportService):
-    __slots__ = ('data', '_files_repo', '_folders_repo', '_folder_ids_set')
+    __slots__ = ('data', '_files_repo', '_folders_repo', '_batch', '_folder_keys_set')
 
     def __init__(self, pg: PG, data: RequestImport):
 
@@ -18,7 +18,8 @@ class ImportService(BaseImportService):
 
         self._folders_repo = None
         self._files_repo = None
-        self._folder_ids_set = None
+        self._batch = None
+        self._folder_keys_set = None
 
     @property
     def folders_repo(self) -> FolderListRepository:
@@ -29,52 +30,39 @@ class ImportService(BaseImportService):
         return self._files_repo
 
     @property
-    def folder_ids_set(self) -> set[str]:
-        """All folder ids from import items id and parent_id fields diff None parent_id"""
-        if self._folder_ids_set is None:
-            self._folder_ids_set = reduce(
-                set.union,
-                (
-                    {i.id, i.parent_id} if i.type == ItemType.FOLDER else {i.parent_id}
-                    for i in self.data.items
-                ),
-                set()
-            )
-            self._folder_ids_set -= {None}
+    def batch(self) -> ImportBatch:
+        if self._batch is None:
+            self._batch = ImportBatch.from_request(self.data)
 
-        return self._folder_ids_set
+        return self._batch
 
-    def _create_items_repos(self, conn: SAConnection):
-        files = {}
-        folders = {}
+    @property
+    def folder_ids_set(self) -> set[str]:
+        """All folder ids from import items id and parent_id fields diff None parent_id"""
+        return self.batch.folder_ids_set
 
-        for item in self.data.items:
-            if item.type == ItemType.FOLDER:
-                folders[item.id] = item
-            else:
-                files[item.id] = item
+    @property
+    def folder_keys_set(self) -> set[int]:
+        """Keys of folder_ids_set"""
+        return self._folder_keys_set
 
-        self._files_repo = FileListRepository(conn, files)
-        self._folders_repo = FolderListRepository(conn, folders)
+    def _create_items_repos(self, conn: SAConnection, node_keys: Mapping[str, int]):
+        self._files_repo = FileListRepository(conn, self.batch.files, node_keys)
+        self._folders_repo = FolderListRepository(conn, self.batch.folders, node_keys)
+        self._folder_keys_set = {node_keys[i] for i in self.folder_ids_set}
 
     async def acquire_locks(self, conn: SAConnection):
-        await self.import_repo.lock_ids(self.folder_ids_set | self.files_repo.ids)
-        await self.import_repo.lock_branches(self.folder_ids_set, self.files_repo.ids)
+        await self.import_repo.lock_keys(self.folder_keys_set | self.files_repo.keys)
+        await self.import_repo.lock_branches(self.folder_keys_set, self.files_repo.keys)
         self.import_repo.release_queue()
 
     async def init_repos(self, conn: SAConnection):
         if self.data.items:
-            self._create_items_repos(conn)
+            node_keys = await self.import_repo.get_node_keys(self.folder_ids_set.union(self.batch.files.ids))
+            self._create_items_repos(conn, node_keys)
             await self.acquire_locks(conn)
 
-            await self.folders_repo.init()
-            await self.files_repo.init()
-
-            if self.folders_repo.ids:
-                await self.files_repo.check_ids_not_exist(self.folders_repo.ids)
-
-            if self.files_repo.ids:
-                await self.folders_repo.check_ids_not_exist(self.files_repo.ids)
+            await self.import_repo.check_type_conflicts(self.folders_repo.keys, self.files_repo.keys)
 
     async def write_history(self):
         """
@@ -87,13 +75,12 @@ class ImportService(BaseImportService):
 
         All records selecting in one recursive query.
 
-        Write in file_history table all file records that will be updated during import.
+        File records that will be updated are written in file_history by the files upsert.
         """
         await self.import_repo.write_folders_history(
-            self.folder_ids_set,
-            self.files_repo.ids
+            self.folder_keys_set,
+            self.files_repo.keys
         )
-        await self.files_repo.write_history()
 
     async def _post_import(self):
         if self.data.items:
@@ -101,20 +88,18 @@ class ImportService(BaseImportService):
 
             await self.write_history()
 
+            # there is no need to know which nodes are new: they have no old parents
             await self.import_repo.subtract_parent_sizes(
-                self.folders_repo.existent_ids,
-                self.files_repo.existent_ids
+                self.folders_repo.keys,
+                self.files_repo.keys
             )
-            # insert new nodes
-            await self.folders_repo.insert_new(import_id),
-            await self.files_repo.insert_new(import_id),
-            # update existent nodes
-            await self.folders_repo.update_existent(import_id),
-            await self.files_repo.update_existent(import_id),
+            await self.folders_repo.upsert(import_id)
+            await self.files_repo.upsert(import_id)
+            await self.import_repo.check_parents_exist()
 
             await self.import_repo.add_parent_sizes(
-                self.files_repo.ids,
-                self.folders_repo.ids
+                self.files_repo.keys,
+                self.folders_repo.keys
             )
 
     async def execute_post_import(self):
@@ -3,7 +3,7 @@ from datetime import datetime
 from asyncpgsa import PG
 from asyncpgsa.connection import SAConnection
 
-from disk.models import ResponseNodeTree, ListResponseItem, ItemType
+from disk.models import TreeNode, ListResponseItem, ItemType
 from .base import BaseImportService, BaseNodeService
 
 
@@ -13,13 +13,13 @@ class NodeService(BaseNodeService):
     def __init__(self, pg: PG, node_id: str):
         super().__init__(pg, node_id)
 
-    async def get_node(self) -> ResponseNodeTree:
+    async def get_node(self) -> TreeNode:
         async with self.pg.pool.acquire() as conn:
             await self.init_repos(conn)
             records = await self.repo.get_node()
 
-        # In general from_records returns a list[NodeTree]. In this case it will always be a single NodeTree list.
-        tree = ResponseNodeTree.from_records(records)[0]
+        # In general from_records returns a list[TreeNode]. In this case it will always be a single TreeNode list.
+        tree = TreeNode.from_records(records)[0]
         return tree
 
     async def get_node_history(self, date_start: datetime, date_end: datetime) -> ListResponseItem:
@@ -37,21 +37,21 @@ class NodeImportService(BaseImportService, BaseNodeService):
         super().__init__(pg, date, node_id)
 
     @property
-    def _import_repo_id_params(self):
+    def _import_repo_key_params(self):
         if self.repo.node_type == ItemType.FOLDER:
-            return self.node_id, None
+            return self.repo.node_key, None
         else:
-            return None, self.node_id
+            return None, self.repo.node_key
 
     async def init_repos(self, conn: SAConnection):
         await self.import_repo.lock_ids((self.node_id,))
         await super().init_repos(conn)
-        await self.import_repo.lock_branches(*self._import_repo_id_params)
+        await self.import_repo.lock_branches(*self._import_repo_key_params)
         self.import_repo.release_queue()
 
     async def _delete_node(self):
         await self.repo.write_parents_to_history()
-        await self.import_repo.subtract_parent_sizes(*self._import_repo_id_params)
+        await self.import_repo.subtract_parent_sizes(*self._import_repo_key_params)
         await self.repo.delete_node()
 
     async def execute_delete_node(self):
@@ -2,10 +2,11 @@ from dataclasses import dataclass
 from typing import Iterable
 
 from deepdiff import DeepDiff
+from sqlalchemy import select
 from sqlalchemy.engine import Connection
 from disk.db.schema import (
     imports_table, folders_table, files_table,
-    folder_history, file_history, ItemType
+    folder_history, file_history, node_keys_table, ItemType
 )
 from .fake_cloud import FakeCloud
 
@@ -30,11 +31,15 @@ def direct_import_to_db(connection: Connection, data: dict):
     folders = [n for n in items if n['type'] == ItemType.FOLDER.value]
     files = [n for n in items if n['type'] == ItemType.FILE.value]
 
+    if items:
+        connection.execute(node_keys_table.insert(), [{'id': n['id']} for n in items])
+    node_keys = dict(connection.execute(select([node_keys_table.c.id, node_keys_table.c.key])))
+
     def prepare_dicts(nodes: list[dict]):
         for n in nodes:
             t = n.pop('type')
-            if 'parentId' in n:
-                n['parent_id'] = n.pop('parentId')
+            n['key'] = node_keys[n.pop('id')]
+            n['parent_key'] = node_keys.get(n.pop('parentId', None))
             if t == ItemType.FOLDER.value:
                 if 'url' in n:
                     n.pop('url')
@@ -53,28 +58,42 @@ def direct_import_to_db(connection: Connection, data: dict):
     return import_id
 
 
+def _select_with_ids(table, key_col, id_label: str, ids: Iterable[str] | None = None):
+    """select all table records, node keys are replaced with external string ids"""
+    node = node_keys_table.alias()
+    parent = node_keys_table.alias()
+
+    columns = [
+        node.c.id.label(id_label) if c is key_col else
+        parent.c.id.label('parent_id') if c.name == 'parent_key' else c
+        for c in table.columns
+    ]
+    query = select(columns).select_from(
+        table.
+        join(node, node.c.key == key_col).
+        outerjoin(parent, parent.c.key == table.c.parent_key)
+    )
+    if ids:
+        query = query.where(node.c.id.in_(list(ids)))
+
+    return query
+
+
 def get_history_records(connection: Connection, type_: ItemType, ids: Iterable[str] | None = None):
     """get all records from history table"""
     if type_ == ItemType.FOLDER:
-        table = folder_history
-        col = folder_history.c.folder_id
+        query = _select_with_ids(folder_history, folder_history.c.folder_key, 'folder_id', ids)
     else:
-        table = file_history
-        col = file_history.c.file_id
-
-    query = table.select()
-    if ids:
-        query = query.where(col.in_(list(ids)))
+        query = _select_with_ids(file_history, file_history.c.file_key, 'file_id', ids)
 
     return [dict(row) for row in connection.execute(query)]
 
 
 def get_node_records(connection: Connection, type_: ItemType, ids: Iterable[str] | None = None):
     """get all records from node table"""
-    table = {ItemType.FOLDER: folders_table, ItemType.FILE: files_table}
-    query = table[type_].select()
-    if ids:
-        query = query.where(table[type_].c.id.in_(list(ids)))
+    table = {ItemType.FOLDER: folders_table, ItemType.FILE: files_table}[type_]
+    query = _select_with_ids(table, table.c.key, 'id', ids)
+
     return [dict(row) for row in connection.execute(query)]
 
 
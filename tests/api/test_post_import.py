@@ -1,4 +1,4 @@
-from datetime import timedelta
+from datetime import timedelta, datetime, timezone
 from http import HTTPStatus
 from itertools import accumulate
 
@@ -223,3 +223,24 @@ async def test_reversed_items_order(
 ):
     await post_import(api_client, reversed_items_import_data, expected_status=HTTPStatus.OK)
     compare_db_fc_state(sync_connection, filled_cloud)
+
+
+async def test_reversed_deep_folder_chain(
+        fake_cloud: FakeCloud,
+        api_client,
+        sync_connection
+):
+    """Children before parents in one import. Parent FKs are deferred, nodes are written in any order."""
+    folders = [Folder()]
+    for _ in range(199):
+        folders.append(Folder(parent_id=folders[-1].id))
+
+    import_data = {
+        'items': [folder.import_dict for folder in folders],
+        'updateDate': str(datetime.now(timezone.utc))
+    }
+    fake_cloud.load_import(import_data)
+    import_data['items'].reverse()
+
+    await post_import(api_client, import_data)
+    compare_db_fc_state(sync_connection, fake_cloud)
@@ -0,0 +1,11 @@
+"""Helpers for benchmarks. Benchmarks are marked as slow."""
+from time import perf_counter
+from typing import Callable, TypeVar
+
+T = TypeVar('T')
+
+
+def timeit(func: Callable[[], T]) -> tuple[float, T]:
+    start = perf_counter()
+    res = func()
+    return perf_counter() - start, res
@@ -0,0 +1,22 @@
+import orjson
+import pytest
+
+from disk.models import RequestImport, parse_request_import
+from disk.utils.testing import FakeCloudGen
+from tests.benchmark_tools import timeit
+
+
+@pytest.mark.slow
+def test_import_parser_benchmark():
+    cloud = FakeCloudGen(write_history=False)
+    cloud.generate_import([[9] * 10 for _ in range(550)])
+    raw = orjson.dumps(cloud.get_import_dict())
+
+    fast_time, received = timeit(lambda: parse_request_import(raw))
+    pydantic_time, expected = timeit(lambda: RequestImport.parse_raw(raw))
+
+    print(f'\n{len(expected.items)} items: parse_request_import {fast_time:.3f}s, '
+          f'RequestImport.parse_raw {pydantic_time:.3f}s')
+
+    assert received == expected
+    assert fast_time < pydantic_time
@@ -0,0 +1,24 @@
+from disk.models import ImportBatch, RequestImport
+from disk.utils.testing import FakeCloudGen
+
+
+def test_import_batch():
+    cloud = FakeCloudGen()
+    cloud.generate_import([[[1, []], 2], [[[]]]], 1)
+    data = cloud.get_import_dict()
+    data['items'].reverse()
+    request_import = RequestImport.parse_obj(data)
+
+    batch = ImportBatch.from_request(request_import)
+    folders, files = batch.folders, batch.files
+
+    assert len(folders) == 7 and len(files) == 4
+    assert set(files.ids) == set(cloud.file_ids)
+    assert set(folders.ids) == batch.folder_ids_set == set(cloud.folder_ids)
+
+    # import order is kept, columns are parallel
+    items = {item['id']: item for item in data['items']}
+    assert files.ids == [i for i in items if i in set(cloud.file_ids)]
+    assert files.columns[2] == [items[i]['url'] for i in files.ids]
+    assert files.columns[3] == [items[i]['size'] for i in files.ids]
+    assert folders.parent_ids == [items[i]['parentId'] for i in folders.ids]
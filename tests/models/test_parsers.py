@@ -0,0 +1,91 @@
+import orjson
+import pytest
+from pydantic import ValidationError
+
+from disk.models import RequestImport, parse_request_import
+from disk.utils.testing import FakeCloudGen, Folder, File
+from tests.post_import_cases import datasets
+
+DATE = '2022-02-01 12:00:00+00:00'
+
+
+def generated_import():
+    cloud = FakeCloudGen()
+    cloud.generate_import([2, [1, []]], [[]], 3)
+    cloud.random_import(schemas_count=3)
+    cloud.random_updates(count=5)
+    return cloud.get_import_dict()
+
+
+def item_import(*items):
+    return {'items': list(items), 'updateDate': DATE}
+
+
+file = File(id='1').import_dict
+folder = Folder(id='2').import_dict
+
+
+valid_payloads = [
+    *(d.import_dict for d in datasets),
+    generated_import(),
+    item_import(),
+    # parent_id field name is allowed too
+    item_import({'id': '1', 'parent_id': '2', 'type': 'FOLDER'}),
+    # pydantic coerces these values
+    item_import(file | {'id': 1}),
+    item_import(file | {'size': 1.0}),
+    item_import(file | {'size': '5'}),
+    {'items': [], 'updateDate': 1643716800},
+    {'items': [], 'updateDate': '2022-02-01T12:00:00Z'},
+]
+
+invalid_payloads = [
+    b'',
+    b'{"items": [], "updateDate": ',
+    b'[]',
+    {'items': []},
+    {'items': [], 'updateDate': DATE, 'foo': 'bar'},
+    {'items': {}, 'updateDate': DATE},
+    {'items': [], 'updateDate': 'yesterday'},
+    {'items': [], 'date': DATE},
+    item_import(file, file),
+    item_import(file, folder | {'id': '1'}),
+    item_import(file | {'foo': 'bar'}),
+    item_import(file | {'id': ''}),
+    item_import(file | {'id': None}),
+    item_import(file | {'parentId': ''}),
+    item_import(file | {'type': 'file'}),
+    item_import(file | {'type': ['FILE']}),
+    item_import(file | {'size': 0}),
+    item_import(file | {'size': None}),
+    item_import(file | {'url': None}),
+    item_import(file | {'url': ''}),
+    item_import(file | {'url': 'a' * 256}),
+    item_import(folder | {'size': 10}),
+    item_import(folder | {'url': 'foo'}),
+    item_import([]),
+]
+
+
+def raw(payload) -> bytes:
+    return payload if isinstance(payload, bytes) else orjson.dumps(payload)
+
+
+@pytest.mark.parametrize('payload', valid_payloads)
+def test_valid(payload):
+    expected = RequestImport.parse_raw(raw(payload))
+    received = parse_request_import(raw(payload))
+
+    assert received == expected
+    assert [item.type for item in received.items] == [item.type for item in expected.items]
+
+
+@pytest.mark.parametrize('payload', invalid_payloads)
+def test_invalid(payload):
+    with pytest.raises(ValidationError) as expected:
+        RequestImport.parse_raw(raw(payload))
+
+    with pytest.raises(ValidationError) as received:
+        parse_request_import(raw(payload))
+
+    assert received.value.errors() == expected.value.errors()